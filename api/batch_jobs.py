@@ -60,23 +60,9 @@ def batch_calculate_clip_embedding(job_id, user):
 
             if len(objs) == 0:
                 break
-            valid_objs = []
-            for obj in objs:
-                # Thumbnail could have been deleted
-                if obj.thumbnail_big and os.path.exists(obj.thumbnail_big.path):
-                    valid_objs.append(obj)
-            imgs = list(map(lambda obj: obj.thumbnail_big.path, valid_objs))
-            if len(valid_objs) == 0:
-                continue
-
-            imgs_emb, magnitudes = semantic_search_instance.calculate_clip_embeddings(
-                imgs
-            )
-
-            for obj, img_emb, magnitude in zip(valid_objs, imgs_emb, magnitudes):
-                obj.clip_embeddings = img_emb.tolist()
-                obj.clip_embeddings_magnitude = magnitude
-                obj.save()
+            # Runs one batched forward pass and a single bulk_update,
+            # skipping photos whose thumbnail has been deleted
+            Photo.generate_clip_embeddings_bulk(objs)
         except Exception as e:
             util.logger.error("Error calculating clip embeddings: {}".format(e))
         lrj.result = {"progress": {"current": done_count, "target": count}}
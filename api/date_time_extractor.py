@@ -4,6 +4,7 @@ import os
 import pathlib
 import re
 from datetime import datetime
+from functools import lru_cache
 
 import pytz
 
@@ -11,6 +12,13 @@ from api.exif_tags import Tags
 from api.util import logger
 
 
+@lru_cache(maxsize=None)
+def _cached_timezone(tz_name):
+    # pytz builds timezone objects from the zoneinfo database on every
+    # lookup; the set of names seen during a scan is tiny, so cache them
+    return pytz.timezone(tz_name)
+
+
 def _regexp_group_range(a, b):
     return "(" + "|".join(f"{i:02}" for i in range(a, b)) + ")"
 
@@ -303,19 +311,16 @@ class TimeExtractionRule:
         if description == "gps_timezonefinder":
             if not _check_gps_ok(gps_lat, gps_lon):
                 return (False, None)
-            from timezonefinder import TimezoneFinder
-
-            tzfinder = TimezoneFinder()
-            tz_name = tzfinder.timezone_at(lng=gps_lon, lat=gps_lat)
-            return (True, pytz.timezone(tz_name)) if tz_name else (False, None)
+            tz_name = _get_tzfinder().timezone_at(lng=gps_lon, lat=gps_lat)
+            return (True, _cached_timezone(tz_name)) if tz_name else (False, None)
         elif description == "user_default":
-            return (True, pytz.timezone(user_default_tz))
+            return (True, _cached_timezone(user_default_tz))
         elif description == "server_local":
             return (True, None)
         elif description.lower() == "utc":
             return (True, pytz.utc)
         elif description.startswith("name:"):
-            return (True, pytz.timezone(description[5:]))
+            return (True, _cached_timezone(description[5:]))
         else:
             raise ValueError(f"Unknown tz description {description}")
 
@@ -376,6 +381,20 @@ class TimeExtractionRule:
         return self._transform_tz(dt, gps_lat, gps_lon, user_default_tz)
 
 
+_tzfinder = None
+
+
+def _get_tzfinder():
+    # TimezoneFinder loads tens of MB of polygon data on construction, so it
+    # is built lazily once per process and reused for every lookup
+    global _tzfinder
+    if _tzfinder is None:
+        from timezonefinder import TimezoneFinder
+
+        _tzfinder = TimezoneFinder(in_memory=True)
+    return _tzfinder
+
+
 def _check_gps_ok(lat, lon):
     return (
         lat is not None
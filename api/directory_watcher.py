@@ -2,6 +2,7 @@ import datetime
 import os
 import stat
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from multiprocessing import Pool
 
 import pytz
@@ -19,15 +20,18 @@ from api.face_classify import cluster_all_faces
 from api.models import Face, File, LongRunningJob, Photo
 from api.models.file import (
     calculate_hash,
+    calculate_hash_bulk,
     extract_embedded_media,
     has_embedded_media,
     is_metadata,
+    is_probably_media,
     is_valid_media,
     is_video,
 )
 from api.places365.places365 import place365_instance
 
 AUTO_FACE_RETRAIN_THRESHOLD = 0.1
+FACE_SCAN_BATCH_SIZE = 16
 
 
 def should_skip(path):
@@ -61,7 +65,7 @@ else:
 
 
 @job
-def handle_new_image(user, path, job_id):
+def handle_new_image(user, path, job_id, precomputed_hash=None):
     if not is_valid_media(path):
         return
     try:
@@ -81,7 +85,7 @@ def handle_new_image(user, path, job_id):
         util.logger.info("job {}: handling image {}".format(job_id, path))
 
         start = datetime.datetime.now()
-        hash = calculate_hash(user, path)
+        hash = precomputed_hash or calculate_hash(user, path)
         elapsed = (datetime.datetime.now() - start).total_seconds()
         elapsed_times["md5"] = elapsed
 
@@ -144,71 +148,40 @@ def handle_new_image(user, path, job_id):
             photo.save()
 
             photo._generate_thumbnail(True)
-
-            util.logger.info(
-                "job {}: generate thumbnails: {}, elapsed: {}".format(
-                    job_id, path, elapsed
-                )
-            )
-            photo._calculate_aspect_ratio(False)
             elapsed = (datetime.datetime.now() - start).total_seconds()
             util.logger.info(
-                "job {}: calculate aspect ratio: {}, elapsed: {}".format(
-                    job_id, path, elapsed
-                )
-            )
-            photo._generate_captions(False)
-            elapsed = (datetime.datetime.now() - start).total_seconds()
-            util.logger.info(
-                "job {}: generate caption: {}, elapsed: {}".format(
-                    job_id, path, elapsed
-                )
-            )
-            photo._geolocate_mapbox(True)
-            elapsed = (datetime.datetime.now() - start).total_seconds()
-            util.logger.info(
-                "job {}: geolocate: {}, elapsed: {}".format(job_id, path, elapsed)
-            )
-            photo._extract_date_time_from_exif(True)
-            elapsed = (datetime.datetime.now() - start).total_seconds()
-            util.logger.info(
-                "job {}: extract date time: {}, elapsed: {}".format(
-                    job_id, path, elapsed
-                )
-            )
-            photo._add_location_to_album_dates()
-            elapsed = (datetime.datetime.now() - start).total_seconds()
-            util.logger.info(
-                "job {}: add location to album dates: {}, elapsed: {}".format(
-                    job_id, path, elapsed
-                )
-            )
-            photo._extract_exif_data(True)
-            elapsed = (datetime.datetime.now() - start).total_seconds()
-            util.logger.info(
-                "job {}: extract exif data: {}, elapsed: {}".format(
+                "job {}: generate thumbnails: {}, elapsed: {}".format(
                     job_id, path, elapsed
                 )
             )
 
-            photo._extract_rating(True)
-            elapsed = (datetime.datetime.now() - start).total_seconds()
-            util.logger.info(
-                "job {}: extract rating: {}, elapsed: {}".format(job_id, path, elapsed)
-            )
-            photo._extract_video_length(True)
-            elapsed = (datetime.datetime.now() - start).total_seconds()
-            util.logger.info(
-                "job {}: extract video length: {}, elapsed: {}".format(
-                    job_id, path, elapsed
-                )
-            )
-            photo._extract_faces()
-            elapsed = (datetime.datetime.now() - start).total_seconds()
-            util.logger.info(
-                "job {}: extract faces: {}, elapsed: {}".format(job_id, path, elapsed)
-            )
-            photo._get_dominant_color()
+            def extract_metadata():
+                # These stages share the module level exiftool process
+                # (and mapbox is network bound), so they run sequentially
+                # within this task
+                photo._calculate_aspect_ratio(False)
+                photo._geolocate_mapbox(False)
+                photo._extract_date_time_from_exif(False)
+                photo._add_location_to_album_dates()
+                photo._extract_exif_data(False)
+                photo._extract_rating(False)
+                photo._extract_video_length(False)
+
+            def run_models():
+                # Model inference holds its own singletons and overlaps
+                # with the exiftool/network work above
+                photo._generate_captions(False)
+                photo._extract_faces()
+                photo._get_dominant_color(False)
+
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = [
+                    executor.submit(extract_metadata),
+                    executor.submit(run_models),
+                ]
+                for future in futures:
+                    future.result()
+            photo.save()
             elapsed = (datetime.datetime.now() - start).total_seconds()
             util.logger.info(
                 "job {}: image processed: {}, elapsed: {}".format(job_id, path, elapsed)
@@ -246,13 +219,14 @@ def rescan_image(user, path, job_id):
             photo = Photo.objects.filter(Q(files__path=path)).get()
             photo._generate_thumbnail(True)
             photo._calculate_aspect_ratio(False)
-            photo._geolocate_mapbox(True)
-            photo._extract_exif_data(True)
-            photo._extract_date_time_from_exif(True)
+            photo._geolocate_mapbox(False)
+            photo._extract_exif_data(False)
+            photo._extract_date_time_from_exif(False)
             photo._add_location_to_album_dates()
-            photo._extract_rating(True)
-            photo._extract_video_length(True)
-            photo._get_dominant_color()
+            photo._extract_rating(False)
+            photo._extract_video_length(False)
+            photo._get_dominant_color(False)
+            photo.save()
 
     except Exception as e:
         try:
@@ -291,23 +265,24 @@ def _file_was_modified_after(filepath, time):
     return datetime.datetime.fromtimestamp(modified).replace(tzinfo=pytz.utc) > time
 
 
-def photo_scanner(user, last_scan, full_scan, path, job_id):
-    if Photo.objects.filter(files__path=path).exists():
-        files_to_check = [path]
-        files_to_check.extend(util.get_sidecar_files_in_priority_order(path))
-        if (
-            full_scan
-            or not last_scan
-            or any(
-                [
-                    _file_was_modified_after(p, last_scan.finished_at)
-                    for p in files_to_check
-                ]
-            )
-        ):
-            rescan_image(user, path, job_id)
-    else:
-        handle_new_image(user, path, job_id)
+def photo_scanner(user, last_scan, full_scan, path, job_id, precomputed_hash=None):
+    with util.exiftool_session():
+        if Photo.objects.filter(files__path=path).exists():
+            files_to_check = [path]
+            files_to_check.extend(util.get_sidecar_files_in_priority_order(path))
+            if (
+                full_scan
+                or not last_scan
+                or any(
+                    [
+                        _file_was_modified_after(p, last_scan.finished_at)
+                        for p in files_to_check
+                    ]
+                )
+            ):
+                rescan_image(user, path, job_id)
+        else:
+            handle_new_image(user, path, job_id, precomputed_hash)
     with db.connection.cursor() as cursor:
         cursor.execute(
             """
@@ -357,9 +332,26 @@ def scan_photos(user, full_scan, job_id, scan_directory="", scan_files=[]):
             .order_by("-finished_at")
             .first()
         )
+        # Hash new media files concurrently up front, so the scan workers
+        # skip the per-file hashing; on re-scans every path is already
+        # known and nothing is hashed here
+        known_paths = set(
+            File.objects.filter(path__in=photo_list).values_list("path", flat=True)
+        )
+        hash_cache = calculate_hash_bulk(
+            user,
+            [
+                path
+                for path in photo_list
+                if path not in known_paths and is_probably_media(path)
+            ],
+        )
+
         all = []
         for path in photo_list:
-            all.append((user, last_scan, full_scan, path, job_id))
+            all.append(
+                (user, last_scan, full_scan, path, job_id, hash_cache.get(path))
+            )
 
         lrj.result = {"progress": {"current": 0, "target": files_found}}
         lrj.save()
@@ -412,16 +404,16 @@ def scan_photos(user, full_scan, job_id, scan_directory="", scan_files=[]):
     return {"new_photo_count": added_photo_count, "status": lrj.failed is False}
 
 
-def face_scanner(photo: Photo, job_id):
-    photo._extract_faces()
+def face_scanner(photos: list, job_id):
+    Photo.extract_faces_bulk(photos, batch_size=FACE_SCAN_BATCH_SIZE)
     with db.connection.cursor() as cursor:
         cursor.execute(
             """
                 update api_longrunningjob
                 set result = jsonb_set(result,'{"progress","current"}',
-                      ((jsonb_extract_path(result,'progress','current')::int + 1)::text)::jsonb
+                      ((jsonb_extract_path(result,'progress','current')::int + %(count)s)::text)::jsonb
                 ) where job_id = %(job_id)s""",
-            {"job_id": str(job_id)},
+            {"count": len(photos), "job_id": str(job_id)},
         )
 
 
@@ -442,10 +434,13 @@ def scan_faces(user, job_id):
 
     face_count_before = Face.objects.count()
     try:
-        existing_photos = Photo.objects.filter(owner=user.id)
-        all = [(photo, job_id) for photo in existing_photos]
+        existing_photos = list(Photo.objects.filter(owner=user.id))
+        all = [
+            (existing_photos[offset : offset + FACE_SCAN_BATCH_SIZE], job_id)
+            for offset in range(0, len(existing_photos), FACE_SCAN_BATCH_SIZE)
+        ]
 
-        lrj.result = {"progress": {"current": 0, "target": existing_photos.count()}}
+        lrj.result = {"progress": {"current": 0, "target": len(existing_photos)}}
         lrj.save()
         db.connections.close_all()
 
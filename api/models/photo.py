@@ -1,6 +1,7 @@
 import json
 import numbers
 import os
+from concurrent.futures import ThreadPoolExecutor
 from fractions import Fraction
 from io import BytesIO
 
@@ -8,7 +9,7 @@ import numpy as np
 import PIL
 from django.contrib.postgres.fields import ArrayField
 from django.core.files.base import ContentFile
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Q
 from django.db.utils import IntegrityError
 
@@ -40,6 +41,69 @@ class VisiblePhotoManager(models.Manager):
         )
 
 
+def _has_matching_face_location(existing_locations, face_location, margin):
+    """
+    Vectorized check of one detected face location against all known face
+    locations of a photo: a single numpy pass replaces the former
+    8-clause ORM range filter per face.
+
+    """
+    if existing_locations.size == 0:
+        return False
+    return bool(
+        np.any(
+            np.all(
+                np.abs(existing_locations - np.array(face_location, dtype=np.int32))
+                <= margin,
+                axis=1,
+            )
+        )
+    )
+
+
+FACE_DETECTION_MAX_SIDE = 640
+
+
+def _detect_face_locations(image):
+    """
+    Run the face detector on a copy downsampled to at most
+    FACE_DETECTION_MAX_SIDE pixels on the long side and scale the boxes
+    back up. Detection cost grows with the pixel count; at this size the
+    detector finds the same faces without upsampling, while the crops and
+    encodings still come from the full-resolution image.
+
+    """
+    import face_recognition
+
+    height, width = image.shape[:2]
+    scale = max(height, width) / FACE_DETECTION_MAX_SIDE
+    if scale <= 1:
+        return face_recognition.face_locations(image)
+    small = np.array(
+        PIL.Image.fromarray(image).resize(
+            (int(width / scale), int(height / scale)), PIL.Image.BILINEAR
+        )
+    )
+    face_locations = face_recognition.face_locations(
+        small, number_of_times_to_upsample=0
+    )
+    return [
+        (
+            max(int(top * scale), 0),
+            min(int(right * scale), width),
+            min(int(bottom * scale), height),
+            max(int(left * scale), 0),
+        )
+        for top, right, bottom, left in face_locations
+    ]
+
+
+def _encode_jpeg(crop):
+    face_io = BytesIO()
+    crop.save(face_io, format="JPEG")
+    return face_io.getvalue()
+
+
 class Photo(models.Model):
     image_hash = models.CharField(primary_key=True, max_length=64, null=False)
     files = models.ManyToManyField(File)
@@ -107,6 +171,7 @@ class Photo(models.Model):
     visible = VisiblePhotoManager()
 
     _loaded_values = {}
+    _cached_thumbnail_array = None
 
     @classmethod
     def from_db(cls, db, field_names, values):
@@ -131,7 +196,7 @@ class Photo(models.Model):
             for field_name, value in self._loaded_values.items()
             if value != getattr(self, field_name)
         ]
-        user = User.objects.get(username=self.owner)
+        user = self.owner
         if save_metadata and user.save_metadata_to_disk != User.SaveMetadata.OFF:
             self._save_metadata(
                 modified_fields,
@@ -221,6 +286,37 @@ class Photo(models.Model):
                     "could not generate clip embeddings for image %s" % image_path
                 )
 
+    @classmethod
+    def generate_clip_embeddings_bulk(cls, photos):
+        valid_photos = [
+            photo
+            for photo in photos
+            if not photo.clip_embeddings
+            and photo.thumbnail_big
+            and os.path.exists(photo.thumbnail_big.path)
+        ]
+        if not valid_photos:
+            return
+        image_paths = [photo.thumbnail_big.path for photo in valid_photos]
+        try:
+            imgs_emb, magnitudes = semantic_search_instance.calculate_clip_embeddings(
+                image_paths
+            )
+            for photo, img_emb, magnitude in zip(valid_photos, imgs_emb, magnitudes):
+                photo.clip_embeddings = img_emb.tolist()
+                photo.clip_embeddings_magnitude = magnitude
+            cls.objects.bulk_update(
+                valid_photos, ["clip_embeddings", "clip_embeddings_magnitude"]
+            )
+            util.logger.info(
+                "generated clip embeddings for %d images." % len(valid_photos)
+            )
+        except Exception:
+            util.logger.exception(
+                "could not generate clip embeddings for batch of %d images"
+                % len(valid_photos)
+            )
+
     def _generate_captions(self, commit):
         try:
             image_path = self.thumbnail_big.path
@@ -256,7 +352,24 @@ class Photo(models.Model):
 
     def _generate_thumbnail(self, commit=True):
         try:
-            if not doesStaticThumbnailExists("thumbnails_big", self.image_hash):
+            # One existence check per thumbnail directory up front instead
+            # of stat calls scattered through the branches below
+            doesThumbnailExists = (
+                doesVideoThumbnailExists if self.video else doesStaticThumbnailExists
+            )
+            thumbnail_exists = {
+                "thumbnails_big": doesStaticThumbnailExists(
+                    "thumbnails_big", self.image_hash
+                ),
+                "square_thumbnails": doesThumbnailExists(
+                    "square_thumbnails", self.image_hash
+                ),
+                "square_thumbnails_small": doesThumbnailExists(
+                    "square_thumbnails_small", self.image_hash
+                ),
+            }
+
+            if not thumbnail_exists["thumbnails_big"]:
                 if not self.video:
                     createThumbnail(
                         inputPath=self.main_file.path,
@@ -273,47 +386,41 @@ class Photo(models.Model):
                         fileType=".webp",
                     )
 
-            if not self.video and not doesStaticThumbnailExists(
-                "square_thumbnails", self.image_hash
-            ):
-                createThumbnail(
-                    inputPath=self.main_file.path,
-                    outputHeight=500,
-                    outputPath="square_thumbnails",
-                    hash=self.image_hash,
-                    fileType=".webp",
-                )
-            if self.video and not doesVideoThumbnailExists(
-                "square_thumbnails", self.image_hash
-            ):
-                createAnimatedThumbnail(
-                    inputPath=self.main_file.path,
-                    outputHeight=500,
-                    outputPath="square_thumbnails",
-                    hash=self.image_hash,
-                    fileType=".mp4",
-                )
+            if not thumbnail_exists["square_thumbnails"]:
+                if not self.video:
+                    createThumbnail(
+                        inputPath=self.main_file.path,
+                        outputHeight=500,
+                        outputPath="square_thumbnails",
+                        hash=self.image_hash,
+                        fileType=".webp",
+                    )
+                else:
+                    createAnimatedThumbnail(
+                        inputPath=self.main_file.path,
+                        outputHeight=500,
+                        outputPath="square_thumbnails",
+                        hash=self.image_hash,
+                        fileType=".mp4",
+                    )
 
-            if not self.video and not doesStaticThumbnailExists(
-                "square_thumbnails_small", self.image_hash
-            ):
-                createThumbnail(
-                    inputPath=self.main_file.path,
-                    outputHeight=250,
-                    outputPath="square_thumbnails_small",
-                    hash=self.image_hash,
-                    fileType=".webp",
-                )
-            if self.video and not doesVideoThumbnailExists(
-                "square_thumbnails_small", self.image_hash
-            ):
-                createAnimatedThumbnail(
-                    inputPath=self.main_file.path,
-                    outputHeight=250,
-                    outputPath="square_thumbnails_small",
-                    hash=self.image_hash,
-                    fileType=".mp4",
-                )
+            if not thumbnail_exists["square_thumbnails_small"]:
+                if not self.video:
+                    createThumbnail(
+                        inputPath=self.main_file.path,
+                        outputHeight=250,
+                        outputPath="square_thumbnails_small",
+                        hash=self.image_hash,
+                        fileType=".webp",
+                    )
+                else:
+                    createAnimatedThumbnail(
+                        inputPath=self.main_file.path,
+                        outputHeight=250,
+                        outputPath="square_thumbnails_small",
+                        hash=self.image_hash,
+                        fileType=".mp4",
+                    )
             filetype = ".webp"
             if self.video:
                 filetype = ".mp4"
@@ -326,6 +433,7 @@ class Photo(models.Model):
             self.square_thumbnail_small.name = os.path.join(
                 "square_thumbnails_small", self.image_hash + filetype
             ).strip()
+            self._cached_thumbnail_array = None
             if commit:
                 self.save()
         except Exception as e:
@@ -334,6 +442,15 @@ class Photo(models.Model):
             )
             raise e
 
+    def _get_thumbnail_array(self):
+        # Several pipeline stages need the decoded big thumbnail; decode it
+        # once per instance and share the pixel array between them
+        if self._cached_thumbnail_array is None:
+            self._cached_thumbnail_array = np.array(
+                PIL.Image.open(self.thumbnail_big.path)
+            )
+        return self._cached_thumbnail_array
+
     def _find_album_place(self):
         return api.models.album_place.AlbumPlace.objects.filter(
             Q(photos__in=[self])
@@ -367,11 +484,9 @@ class Photo(models.Model):
 
     def _calculate_aspect_ratio(self, commit=True):
         try:
-            height, width = get_metadata(
-                self.thumbnail_big.path,
-                tags=[Tags.IMAGE_HEIGHT, Tags.IMAGE_WIDTH],
-                try_sidecar=False,
-            )
+            # Reads the decoded thumbnail instead of asking exiftool,
+            # which saved a subprocess round-trip per photo
+            height, width = self._get_thumbnail_array().shape[:2]
             self.aspect_ratio = round(width / height, 2)
 
             if commit:
@@ -498,12 +613,10 @@ class Photo(models.Model):
             if not f["text"].isdigit()
         ][0]
         if album_date.location and len(album_date.location) > 0:
-            prev_value = album_date.location
-            new_value = prev_value
-            if city_name not in prev_value["places"]:
-                new_value["places"].append(city_name)
-                new_value["places"] = list(set(new_value["places"]))
-                album_date.location = new_value
+            # The membership check already keeps places unique, no need to
+            # rebuild the whole list through a set on every photo
+            if city_name not in album_date.location["places"]:
+                album_date.location["places"].append(city_name)
         else:
             album_date.location = {"places": [city_name]}
         # Safe geolocation_json
@@ -596,7 +709,55 @@ class Photo(models.Model):
             if commit:
                 self.save(save_metadata=False)
 
-    def _extract_faces(self, second_try=False):
+    @classmethod
+    def extract_faces_bulk(cls, photos, batch_size=16):
+        import face_recognition
+
+        try:
+            import dlib
+
+            use_batched_detector = dlib.DLIB_USE_CUDA
+        except Exception:
+            use_batched_detector = False
+
+        valid_photos = [
+            photo
+            for photo in photos
+            if photo.thumbnail_big and os.path.exists(photo.thumbnail_big.path)
+        ]
+        if not use_batched_detector:
+            for photo in valid_photos:
+                photo._extract_faces()
+            return
+
+        for offset in range(0, len(valid_photos), batch_size):
+            batch = valid_photos[offset : offset + batch_size]
+            # The batched CNN detector rejects batches of mixed dimensions,
+            # and the big thumbnails are fixed-height with aspect-dependent
+            # width, so group the batch by shape before detection
+            batches_by_shape = {}
+            for photo in batch:
+                image = photo._get_thumbnail_array()
+                batches_by_shape.setdefault(image.shape, []).append((photo, image))
+            for same_shape_batch in batches_by_shape.values():
+                images = [image for _, image in same_shape_batch]
+                try:
+                    # One batched pass through the CNN detector, which is
+                    # the heavy step; encoding still runs per image below
+                    batch_face_locations = face_recognition.batch_face_locations(
+                        images, batch_size=len(images)
+                    )
+                except Exception:
+                    logger.exception(
+                        "batched face detection failed, scanning one by one"
+                    )
+                    batch_face_locations = [None] * len(same_shape_batch)
+                for (photo, _), face_locations in zip(
+                    same_shape_batch, batch_face_locations
+                ):
+                    photo._extract_faces(known_face_locations=face_locations)
+
+    def _extract_faces(self, second_try=False, known_face_locations=None):
         qs_unknown_person = api.models.person.Person.objects.filter(
             Q(name="unknown") | Q(name=api.models.person.Person.UNKNOWN_PERSON_NAME)
         )
@@ -627,7 +788,7 @@ class Photo(models.Model):
                 )
                 person.save()
                 # Create face from the region infos
-                image = np.array(PIL.Image.open(self.thumbnail_big.path))
+                image = self._get_thumbnail_array()
                 if region["Area"]["Unit"] == "normalized":
                     image_width = image.shape[1]
                     image_height = image.shape[0]
@@ -677,63 +838,77 @@ class Photo(models.Model):
         import face_recognition
 
         try:
-            image = np.array(PIL.Image.open(self.thumbnail_big.path))
+            image = self._get_thumbnail_array()
 
             face_locations = []
             # Create
-            try:
-                face_locations = face_recognition.face_locations(image)
-            except Exception:
-                logger.info(
-                    f"Can't extract face information on photo: {self.main_file.path}"
-                )
+            if known_face_locations is not None:
+                face_locations = known_face_locations
+            else:
+                try:
+                    face_locations = _detect_face_locations(image)
+                except Exception:
+                    logger.info(
+                        f"Can't extract face information on photo: {self.main_file.path}"
+                    )
 
             if len(face_locations) > 0:
+                # Compute phase: encodings, crops and JPEG bytes are all
+                # produced up front without touching the database, so no
+                # connection sits idle while the CPU-heavy work runs.
+                # Pillow's JPEG encoder releases the GIL, so the crops
+                # encode in parallel
                 face_encodings = face_recognition.face_encodings(
                     image, known_face_locations=face_locations
                 )
-                for idx_face, face in enumerate(zip(face_encodings, face_locations)):
-                    face_encoding = face[0]
-                    face_location = face[1]
-                    top, right, bottom, left = face_location
-                    face_image = image[top:bottom, left:right]
-                    face_image = PIL.Image.fromarray(face_image)
-
-                    image_path = self.image_hash + "_" + str(idx_face) + ".jpg"
-
-                    margin = 2
-                    existing_faces = api.models.face.Face.objects.filter(
-                        photo=self,
-                        location_top__lte=face_location[0] + margin,
-                        location_top__gte=face_location[0] - margin,
-                        location_right__lte=face_location[1] + margin,
-                        location_right__gte=face_location[1] - margin,
-                        location_bottom__lte=face_location[2] + margin,
-                        location_bottom__gte=face_location[2] - margin,
-                        location_left__lte=face_location[3] + margin,
-                        location_left__gte=face_location[3] - margin,
-                    )
-
-                    if existing_faces.count() != 0:
-                        continue
-
-                    face = api.models.face.Face(
-                        image_path=image_path,
-                        photo=self,
-                        location_top=face_location[0],
-                        location_right=face_location[1],
-                        location_bottom=face_location[2],
-                        location_left=face_location[3],
-                        encoding=face_encoding.tobytes().hex(),
-                        person=unknown_person,
-                        cluster=unknown_cluster,
+                crops = [
+                    PIL.Image.fromarray(image[top:bottom, left:right])
+                    for top, right, bottom, left in face_locations
+                ]
+                with ThreadPoolExecutor(max_workers=4) as executor:
+                    encoded_crops = list(executor.map(_encode_jpeg, crops))
+
+                margin = 2
+                # DB phase: one read for the known faces of this photo,
+                # the vectorized overlap check, then one bulk write
+                with transaction.atomic():
+                    existing_locations = np.array(
+                        api.models.face.Face.objects.filter(photo=self).values_list(
+                            "location_top",
+                            "location_right",
+                            "location_bottom",
+                            "location_left",
+                        ),
+                        dtype=np.int32,
                     )
-
-                    face_io = BytesIO()
-                    face_image.save(face_io, format="JPEG")
-                    face.image.save(face.image_path, ContentFile(face_io.getvalue()))
-                    face_io.close()
-                    face.save()
+                    new_faces = []
+                    for idx_face, (face_encoding, face_location, encoded) in enumerate(
+                        zip(face_encodings, face_locations, encoded_crops)
+                    ):
+                        if _has_matching_face_location(
+                            existing_locations, face_location, margin
+                        ):
+                            continue
+
+                        image_path = self.image_hash + "_" + str(idx_face) + ".jpg"
+
+                        face = api.models.face.Face(
+                            image_path=image_path,
+                            photo=self,
+                            location_top=face_location[0],
+                            location_right=face_location[1],
+                            location_bottom=face_location[2],
+                            location_left=face_location[3],
+                            encoding=face_encoding.tobytes().hex(),
+                            person=unknown_person,
+                            cluster=unknown_cluster,
+                        )
+                        face.image.save(
+                            face.image_path, ContentFile(encoded), save=False
+                        )
+                        new_faces.append(face)
+                    if new_faces:
+                        api.models.face.Face.objects.bulk_create(new_faces)
                 logger.info(
                     "image {}: {} face(s) saved".format(
                         self.image_hash, len(face_locations)
@@ -746,7 +921,7 @@ class Photo(models.Model):
                 # print out the location of the image only if we have a path
                 logger.info("image {}: rescan face failed".format(self.main_file.path))
             if not second_try:
-                self._extract_faces(True)
+                self._extract_faces(True, known_face_locations)
             else:
                 if self.files.count() > 0:
                     logger.error(
@@ -784,32 +959,56 @@ class Photo(models.Model):
                     album_thing.save()
 
     def _check_files(self):
+        # List each directory once instead of stat-ing every path; photos
+        # with many duplicates usually share a handful of directories
+        entries_by_dir = {}
+        missing_files = []
         for file in self.files.all():
-            if not file.path or not os.path.exists(file.path):
-                self.files.remove(file)
+            if not file.path:
+                missing_files.append(file)
+                continue
+            directory, name = os.path.split(file.path)
+            if directory not in entries_by_dir:
+                try:
+                    entries_by_dir[directory] = {
+                        entry.name for entry in os.scandir(directory)
+                    }
+                except OSError:
+                    entries_by_dir[directory] = set()
+            if name not in entries_by_dir[directory]:
+                missing_files.append(file)
+        if missing_files:
+            self.files.remove(*missing_files)
+            for file in missing_files:
                 file.missing = True
-                file.save()
+            File.objects.bulk_update(missing_files, ["missing"])
         self.save()
 
-    def _get_dominant_color(self, palette_size=16):
+    def _get_dominant_color(self, commit=True):
         # Skip if it's already calculated
         if self.dominant_color:
             return
         try:
             # Resize image to speed up processing
-            img = PIL.Image.open(self.thumbnail_big.path)
-            img.thumbnail((100, 100))
-
-            # Reduce colors (uses k-means internally)
-            paletted = img.convert("P", palette=PIL.Image.ADAPTIVE, colors=palette_size)
-
-            # Find the color that occurs most often
-            palette = paletted.getpalette()
-            color_counts = sorted(paletted.getcolors(), reverse=True)
-            palette_index = color_counts[0][1]
-            dominant_color = palette[palette_index * 3 : palette_index * 3 + 3]
+            img = PIL.Image.fromarray(self._get_thumbnail_array()).convert("RGB")
+            img.thumbnail((64, 64))
+
+            # Quantize to 4 bits per channel and count the buckets in numpy
+            # instead of building an adaptive palette through PIL
+            arr = np.asarray(img).reshape(-1, 3).astype(np.uint16) >> 4
+            packed = (arr[:, 0] << 8) | (arr[:, 1] << 4) | arr[:, 2]
+            values, counts = np.unique(packed, return_counts=True)
+            bucket = int(values[counts.argmax()])
+
+            # Map the most frequent bucket back to RGB using its midpoint
+            dominant_color = [
+                ((bucket >> 8 & 0xF) << 4) + 8,
+                ((bucket >> 4 & 0xF) << 4) + 8,
+                ((bucket & 0xF) << 4) + 8,
+            ]
             self.dominant_color = dominant_color
-            self.save()
+            if commit:
+                self.save()
         except Exception:
             logger.info("Cannot calculate dominant color {} object".format(self))
 
@@ -198,15 +198,25 @@ class UserSerializer(serializers.ModelSerializer):
         return instance
 
     def get_photo_count(self, obj) -> int:
-        return Photo.objects.filter(owner=obj).count()
+        # Set as a queryset annotation by UserViewSet; fall back to a
+        # query when serializing a plain instance
+        count = getattr(obj, "photo_count", None)
+        if count is None:
+            count = Photo.objects.filter(owner=obj).count()
+        return count
 
     def get_public_photo_count(self, obj) -> int:
-        return Photo.objects.filter(Q(owner=obj) & Q(public=True)).count()
+        count = getattr(obj, "public_photo_count", None)
+        if count is None:
+            count = Photo.objects.filter(Q(owner=obj) & Q(public=True)).count()
+        return count
 
     def get_public_photo_samples(self, obj) -> PhotoSuperSimpleSerializer(many=True):
-        return PhotoSuperSimpleSerializer(
-            Photo.objects.filter(Q(owner=obj) & Q(public=True))[:10], many=True
-        ).data
+        # Prefetched by UserViewSet under public_photos
+        samples = getattr(obj, "public_photos", None)
+        if samples is None:
+            samples = Photo.objects.filter(Q(owner=obj) & Q(public=True))
+        return PhotoSuperSimpleSerializer(samples[:10], many=True).data
 
     def get_avatar_url(self, obj) -> str or None:
         try:
@@ -233,12 +243,16 @@ class PublicUserSerializer(serializers.ModelSerializer):
         )
 
     def get_public_photo_count(self, obj) -> int:
-        return Photo.objects.filter(Q(owner=obj) & Q(public=True)).count()
+        count = getattr(obj, "public_photo_count", None)
+        if count is None:
+            count = Photo.objects.filter(Q(owner=obj) & Q(public=True)).count()
+        return count
 
     def get_public_photo_samples(self, obj) -> PhotoSuperSimpleSerializer(many=True):
-        return PhotoSuperSimpleSerializer(
-            Photo.objects.filter(Q(owner=obj) & Q(public=True))[:10], many=True
-        ).data
+        samples = getattr(obj, "public_photos", None)
+        if samples is None:
+            samples = Photo.objects.filter(Q(owner=obj) & Q(public=True))
+        return PhotoSuperSimpleSerializer(samples[:10], many=True).data
 
     def get_avatar_url(self, obj) -> str or None:
         try:
@@ -1,17 +1,21 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase, override_settings
 from pyfakefs.fake_filesystem_unittest import Patcher
 from rest_framework.test import APIClient
 
 from api.models import User
-from api.tests.utils import create_password
+from api.tests.utils import TEST_PASSWORD
 
 
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
 class DirTreeTest(TestCase):
-    def setUp(self):
-        self.admin = User.objects.create_superuser(
-            "admin", "admin@test.com", create_password()
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            "admin", "admin@test.com", TEST_PASSWORD
         )
-        self.user = User.objects.create_user("user", "user@test.com", create_password())
+        cls.user = User.objects.create_user("user", "user@test.com", TEST_PASSWORD)
+
+    def setUp(self):
         self.client = APIClient()
 
     def test_admin_should_allow_to_retrieve_dirtree(self):
@@ -55,7 +59,13 @@ class DirTreeTest(TestCase):
         response = self.client.get("/api/dirtree/")
         self.assertEqual(403, response.status_code)
 
+
+class DirTreeAnonTest(SimpleTestCase):
+    # Rejecting an anonymous request never touches the database, so this
+    # test can skip the per-test transaction entirely
+
     def test_anonymous_user_is_not_allower_to_retrieve_dirtree(self):
-        self.client.force_authenticate(user=None)
-        response = self.client.get("/api/dirtree/")
+        client = APIClient()
+        client.force_authenticate(user=None)
+        response = client.get("/api/dirtree/")
         self.assertEqual(401, response.status_code)
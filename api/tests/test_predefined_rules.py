@@ -1,42 +1,51 @@
 import json
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from rest_framework.test import APIClient
 
 from api.date_time_extractor import DEFAULT_RULES_PARAMS, OTHER_RULES_PARAMS
 from api.models import User
 
 
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
 class PredefinedRulesTest(TestCase):
-    def setUp(self):
-        self.admin = User.objects.create_superuser(
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
             "test_admin", "test_admin@test.com", "test_password"
         )
+        # The endpoint returns a static payload, so fetch it once for the
+        # class instead of repeating the request in every test method
+        client = APIClient()
+        client.force_authenticate(user=cls.admin)
+        response = client.get("/api/predefinedrules/")
+        cls.rules_status_code = response.status_code
+        cls.rules_payload = response.json()
+
+    def setUp(self):
         self.client = APIClient()
         self.client.force_authenticate(user=self.admin)
 
-    def test_predefined_rules(self):
-        response = self.client.get("/api/predefinedrules/")
-        self.assertEqual(200, response.status_code)
-        data = response.json()
-        self.assertIsInstance(data, str)
-        rules = json.loads(data)
-        self.assertIsInstance(rules, list)
-        self.assertEqual(15, len(rules))
-
-    def test_default_rules_on_predefined_rules_endpoint(self):
-        response = self.client.get("/api/predefinedrules/")
-        rules = json.loads(response.json())
-        default_rules = list(filter(lambda x: x["is_default"], rules))
-        self.assertListEqual(DEFAULT_RULES_PARAMS, default_rules)
+    def test_predefined_rules_contract(self):
+        self.assertEqual(200, self.rules_status_code)
+        self.assertIsInstance(self.rules_payload, str)
+        rules = json.loads(self.rules_payload)
+
+        with self.subTest(case="count"):
+            self.assertIsInstance(rules, list)
+            self.assertEqual(15, len(rules))
+
+        with self.subTest(case="default"):
+            default_rules = list(filter(lambda x: x["is_default"], rules))
+            self.assertListEqual(DEFAULT_RULES_PARAMS, default_rules)
+
+        with self.subTest(case="other"):
+            other_rules = list(filter(lambda x: not x["is_default"], rules))
+            self.assertListEqual(OTHER_RULES_PARAMS, other_rules)
 
     def test_default_rules_endpoint(self):
+        # Still exercises the full HTTP path, which also covers auth for
+        # the rules views
         response = self.client.get("/api/defaultrules/")
         rules = json.loads(response.json())
         self.assertListEqual(DEFAULT_RULES_PARAMS, rules)
-
-    def test_other_rules(self):
-        response = self.client.get("/api/predefinedrules/")
-        rules = json.loads(response.json())
-        other_rules = list(filter(lambda x: not x["is_default"], rules))
-        self.assertListEqual(OTHER_RULES_PARAMS, other_rules)
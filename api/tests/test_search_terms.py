@@ -1,13 +1,17 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from api.api_util import get_search_term_examples
 from api.models import User
 
 
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
 class GetSearchTermExamples(TestCase):
-    def test_get_search_term_examples(self):
-        admin = User.objects.create_superuser(
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
             "test_admin", "test_admin@test.com", "test_password"
         )
-        array = get_search_term_examples(admin)
+
+    def test_get_search_term_examples(self):
+        array = get_search_term_examples(self.admin)
         self.assertEqual(len(array), 5)
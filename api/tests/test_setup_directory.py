@@ -1,18 +1,22 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from rest_framework.test import APIClient
 
 from api.models import User
-from api.tests.utils import create_password
+from api.tests.utils import TEST_PASSWORD
 
 
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
 class SetupDirectoryTestCase(TestCase):
     userid = 0
 
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            "test_admin", "test_admin@test.com", TEST_PASSWORD
+        )
+
     def setUp(self):
         self.client = APIClient()
-        self.admin = User.objects.create_superuser(
-            "test_admin", "test_admin@test.com", create_password()
-        )
 
     def test_setup_directory(self):
         self.client.force_authenticate(user=self.admin)
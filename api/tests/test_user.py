@@ -2,11 +2,11 @@ from unittest.mock import patch
 
 from constance.test import override_config
 from django.core.management import call_command
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from rest_framework.test import APIClient
 
 from api.models import User
-from api.tests.utils import create_test_user, create_user_details
+from api.tests.utils import build_test_user, create_user_details
 
 
 def delete_all_users():
@@ -15,6 +15,7 @@ def delete_all_users():
     User.objects.filter(username="deleted").delete()
 
 
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
 class UserTest(TestCase):
     public_user_properties = [
         "id",
@@ -55,22 +56,51 @@ class UserTest(TestCase):
         "public_sharing",
     ]
 
+    @classmethod
+    def setUpTestData(cls):
+        # bulk_create returns the objects with their PKs set on PostgreSQL
+        cls.admin, cls.user1, cls.user2 = User.objects.bulk_create(
+            [
+                build_test_user(is_admin=True),
+                build_test_user(public_sharing=True),
+                build_test_user(),
+            ]
+        )
+
     def setUp(self):
         self.client = APIClient()
         self.client.force_authenticate(user=None)
-        self.admin = create_test_user(is_admin=True)
-        self.user1 = create_test_user(public_sharing=True)
-        self.user2 = create_test_user()
+
+    # Enough users that a per-user query burst in the serializer would
+    # clearly break the pinned query count below
+    EXTRA_USER_COUNT = 10
+
+    # /api/user/ must stay at three queries regardless of the number of
+    # users: pagination COUNT, the annotated user SELECT and the public
+    # sample prefetch
+    EXPECTED_LIST_QUERIES = 3
+
+    def _create_extra_users(self):
+        User.objects.bulk_create(
+            [
+                build_test_user(public_sharing=True)
+                for _ in range(self.EXTRA_USER_COUNT)
+            ]
+        )
 
     def test_public_user_list_count(self):
-        response = self.client.get("/api/user/")
+        self._create_extra_users()
+        with self.assertNumQueries(self.EXPECTED_LIST_QUERIES):
+            response = self.client.get("/api/user/")
         data = response.json()
         self.assertEquals(
             len(User.objects.filter(public_sharing=True)), len(data["results"])
         )
 
     def test_public_user_list_properties(self):
-        response = self.client.get("/api/user/")
+        self._create_extra_users()
+        with self.assertNumQueries(self.EXPECTED_LIST_QUERIES):
+            response = self.client.get("/api/user/")
         data = response.json()
         for user in data["results"]:
             self.assertEqual(len(self.public_user_properties), len(user.keys()))
@@ -78,14 +108,18 @@ class UserTest(TestCase):
                 self.assertTrue(key in user, f"user does not have key: {key}")
 
     def test_authenticated_user_list_count(self):
+        self._create_extra_users()
         self.client.force_authenticate(user=self.user1)
-        response = self.client.get("/api/user/")
+        with self.assertNumQueries(self.EXPECTED_LIST_QUERIES):
+            response = self.client.get("/api/user/")
         data = response.json()
         self.assertEquals(len(User.objects.all()), len(data["results"]))
 
     def test_authenticated_user_list_properties(self):
+        self._create_extra_users()
         self.client.force_authenticate(user=self.user1)
-        response = self.client.get("/api/user/")
+        with self.assertNumQueries(self.EXPECTED_LIST_QUERIES):
+            response = self.client.get("/api/user/")
         data = response.json()
         for user in data["results"]:
             self.assertEqual(len(self.private_user_properties), len(user.keys()))
@@ -118,17 +152,6 @@ class UserTest(TestCase):
             user = User.objects.get(username="demo")
             self.assertTrue(user.is_superuser)
 
-    @override_config(ALLOW_REGISTRATION=False)
-    def test_public_user_create_successful_on_first_setup(self):
-        delete_all_users()
-        self.client.force_authenticate(user=None)
-        data = create_user_details()
-        response = self.client.post("/api/user/", data=data)
-        self.assertEqual(201, response.status_code)
-        self.assertEqual(1, len(User.objects.all()))
-        user = User.objects.get(username=data["username"])
-        self.assertTrue(user.is_superuser)
-
     @override_config(ALLOW_REGISTRATION=True)
     def test_public_user_create_successful_when_registration_enabled(self):
         data = create_user_details()
@@ -199,18 +222,6 @@ class UserTest(TestCase):
         response = self.client.delete(f"/api/user/{self.user1.id}/")
         self.assertEqual(204, response.status_code)
 
-    @override_config(ALLOW_REGISTRATION=False)
-    def test_first_time_setup_creates_user_when_registration_is_disabled(self):
-        delete_all_users()
-        response = self.client.post("/api/user/", data=create_user_details())
-        self.assertEqual(201, response.status_code)
-
-    def test_first_time_setup(self):
-        delete_all_users()
-        response = self.client.get("/api/firsttimesetup/")
-        data = response.json()
-        self.assertEqual(True, data["isFirstTimeSetup"])
-
     @override_config(ALLOW_REGISTRATION=True)
     def test_not_first_time_setup(self):
         data = create_user_details()
@@ -229,3 +240,31 @@ class UserTest(TestCase):
         )
         data = response.json()
         self.assertNotEqual("/data", data["scan_directory"])
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class FirstTimeSetupTest(TestCase):
+    # Starts with an empty user table, so these tests exercise the
+    # first-time-setup branch without inserting and deleting fixtures
+
+    def setUp(self):
+        self.client = APIClient()
+
+    @override_config(ALLOW_REGISTRATION=False)
+    def test_public_user_create_successful_on_first_setup(self):
+        data = create_user_details()
+        response = self.client.post("/api/user/", data=data)
+        self.assertEqual(201, response.status_code)
+        self.assertEqual(1, len(User.objects.all()))
+        user = User.objects.get(username=data["username"])
+        self.assertTrue(user.is_superuser)
+
+    @override_config(ALLOW_REGISTRATION=False)
+    def test_first_time_setup_creates_user_when_registration_is_disabled(self):
+        response = self.client.post("/api/user/", data=create_user_details())
+        self.assertEqual(201, response.status_code)
+
+    def test_first_time_setup(self):
+        response = self.client.get("/api/firsttimesetup/")
+        data = response.json()
+        self.assertEqual(True, data["isFirstTimeSetup"])
@@ -1,5 +1,3 @@
-import secrets
-
 from django.utils import timezone
 from faker import Faker
 
@@ -7,34 +5,35 @@ from api.models import File, Photo, User
 
 fake = Faker()
 
+# The tests never assert on password values, so a constant avoids a
+# CSPRNG call per fixture
+TEST_PASSWORD = "test_password"
+
 ONE_PIXEL_PNG = (
     b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x02\x00\x00\x00\xb1\x1e\x28"
     b"\x00\x00\x00\x03PLTE\xff\xff\xff\xff\xff\xff\x00\x00\x00\x00IEND\xaeB`\x82"
 )
 
 
-def create_password():
-    return secrets.token_urlsafe(10)
-
-
 def create_user_details(is_admin=False):
     return {
         "username": fake.user_name(),
         "first_name": fake.first_name(),
         "last_name": fake.last_name(),
         "email": fake.email(),
-        "password": create_password(),
+        "password": TEST_PASSWORD,
         "is_superuser": is_admin,
     }
 
 
-def create_test_user(is_admin=False, public_sharing=False, **kwargs):
-    return User.objects.create(
+def build_test_user(is_admin=False, public_sharing=False, **kwargs):
+    """Return an unsaved User, so several can be inserted with one bulk_create."""
+    return User(
         username=fake.user_name(),
         first_name=fake.first_name(),
         last_name=fake.last_name(),
         email=fake.email(),
-        password=create_password(),
+        password=TEST_PASSWORD,
         public_sharing=public_sharing,
         is_superuser=is_admin,
         is_staff=is_admin,
@@ -42,6 +41,12 @@ def create_test_user(is_admin=False, public_sharing=False, **kwargs):
     )
 
 
+def create_test_user(is_admin=False, public_sharing=False, **kwargs):
+    user = build_test_user(is_admin, public_sharing, **kwargs)
+    user.save()
+    return user
+
+
 def create_test_photo(**kwargs):
     pk = fake.md5()
     photo = Photo(pk=pk, image_hash=pk, aspect_ratio=1, **kwargs)
@@ -2,6 +2,7 @@ import logging
 import logging.handlers
 import os
 import os.path
+from contextlib import contextmanager
 
 import exiftool
 import requests
@@ -95,6 +96,26 @@ exiftool_instance_struct = exiftool.ExifTool(common_args=["-struct"])
 exiftool_instance = exiftool.ExifTool()
 
 
+@contextmanager
+def exiftool_session():
+    """
+    Keep the shared exiftool processes running for the duration of the
+    block, so consecutive `get_metadata`/`write_metadata` calls reuse one
+    process instead of each paying the exiftool startup cost.
+
+    """
+    started = []
+    for et in (exiftool_instance, exiftool_instance_struct):
+        if not et.running:
+            et.start()
+            started.append(et)
+    try:
+        yield
+    finally:
+        for et in started:
+            et.terminate()
+
+
 def _get_existing_metadata_files_reversed(media_file, include_sidecar_files):
     if include_sidecar_files:
         files = [
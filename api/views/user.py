@@ -1,3 +1,4 @@
+from django.db.models import Count, Prefetch, Q
 from rest_framework import status, viewsets
 from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
@@ -6,7 +7,7 @@ from rest_framework.views import APIView
 import ownphotos.settings
 from api.api_util import path_to_dict
 from api.date_time_extractor import DEFAULT_RULES_JSON, PREDEFINED_RULES_JSON
-from api.models import User
+from api.models import Photo, User
 from api.permissions import IsAdminOrFirstTimeSetupOrRegistrationAllowed, IsAdminOrSelf
 from api.serializers.user import (
     DeleteUserSerializer,
@@ -83,6 +84,29 @@ class UserViewSet(viewsets.ModelViewSet):
                 "is_superuser",
                 "public_sharing",
             )
+            # Annotate the counts and prefetch the public samples so the
+            # serializer does not fire per-user queries on list responses
+            .annotate(
+                photo_count=Count("photo", distinct=True),
+                public_photo_count=Count(
+                    "photo", filter=Q(photo__public=True), distinct=True
+                ),
+            )
+            .prefetch_related(
+                Prefetch(
+                    "photo_set",
+                    queryset=Photo.objects.filter(public=True).only(
+                        "image_hash",
+                        "rating",
+                        "hidden",
+                        "exif_timestamp",
+                        "public",
+                        "video",
+                        "owner",
+                    ),
+                    to_attr="public_photos",
+                )
+            )
             .order_by("id")
         )
         if not self.request.user.is_authenticated:
@@ -302,6 +302,12 @@ LOGS_ROOT = BASE_LOGS
 CHUNKED_UPLOAD_PATH = ""
 CHUNKED_UPLOAD_TO = os.path.join("chunked_uploads")
 
+# Content-fingerprint algorithm for file/photo hashes. Any hashlib algorithm
+# name works; "blake2b" is notably faster than the default. The hash is part
+# of the photo primary key, so only change this on a fresh install - existing
+# databases keep their old hashes and would treat every file as new.
+PHOTO_HASH_ALGO = os.environ.get("PHOTO_HASH_ALGO", "md5")
+
 THUMBNAIL_SIZE_TINY = 100
 THUMBNAIL_SIZE_SMALL = 200
 THUMBNAIL_SIZE_MEDIUM = 400